@@ -3,12 +3,15 @@
 from __future__ import annotations
 
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from datetime import date, datetime
+from functools import lru_cache
 from typing import Any
 
 import tiktoken
 from loguru import logger
-from pydantic import BaseModel, ValidationError, create_model
+from pydantic import BaseModel, ValidationError
 
 from language_models.agent.chat import (
     Chat,
@@ -19,17 +22,16 @@ from language_models.agent.chat import (
 )
 from language_models.agent.output_parser import (
     CHAIN_OF_THOUGHT_FINAL_ANSWER_INSTRUCTIONS,
-    FINAL_ANSWER_INSTRUCTIONS,
     AgentOutputParser,
     LLMFinalAnswer,
     LLMToolUse,
     OutputType,
     PromptingStrategy,
-    get_schema_from_args,
 )
 from language_models.agent.prompt import (
     CHAIN_OF_THOUGHT_INSTRUCTIONS_WITH_TOOLS,
     CHAIN_OF_THOUGHT_INSTRUCTIONS_WITHOUT_TOOLS,
+    CONVERSATION_SUMMARY,
     SINGLE_COMPLETION_INSTRUCTIONS,
 )
 from language_models.models.llm import ChatMessage, ChatMessageRole, OpenAILanguageModel
@@ -46,23 +48,146 @@ _MODEL_TOKEN_LIMIT = {
     "gpt-35-turbo-16k": 16385,
 }
 
+_SUMMARY_TOKEN_FRACTION = 0.3
+_SUMMARY_MAX_TOKEN_FRACTION = 0.2
+_SUMMARY_MESSAGE_LENGTH = 300
 
-def num_tokens_from_messages(messages: list[ChatMessage]) -> int:
-    """Counts the number of tokens in the conversation history."""
-    encoding = tiktoken.get_encoding("cl100k_base")
+_MAX_TOOL_OUTPUT_LENGTH = 4000
+_MAX_TOOL_OUTPUT_STRING_LENGTH = 500
+_MAX_TOOL_OUTPUT_ITEMS = 10
+
+
+@lru_cache(maxsize=1)
+def _get_encoding() -> tiktoken.Encoding:
+    """Loads the cl100k_base encoding once per process."""
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def _num_tokens_from_message(message: ChatMessage) -> int:
+    """Counts the number of tokens in a chat message."""
+    encoding = _get_encoding()
     tokens_per_message = 3
     tokens_per_name = 1
-    num_tokens = 0
-    for message in messages:
-        num_tokens += tokens_per_message
-        for key, value in message.model_dump().items():
-            num_tokens += len(encoding.encode(value))
-            if key == "name":
-                num_tokens += tokens_per_name
-    num_tokens += 3
+    num_tokens = tokens_per_message
+    num_tokens += len(encoding.encode_ordinary(message.role))
+    num_tokens += len(encoding.encode_ordinary(message.content))
+    name = getattr(message, "name", None)
+    if name is not None:
+        num_tokens += tokens_per_name + len(encoding.encode_ordinary(name))
     return num_tokens
 
 
+def num_tokens_from_messages(messages: list[ChatMessage]) -> int:
+    """Counts the number of tokens in the conversation history."""
+    return sum(_num_tokens_from_message(message) for message in messages) + 3
+
+
+def _truncate(text: str, max_length: int) -> str:
+    """Truncates a text and notes how many characters were removed."""
+    num_truncated_chars = len(text) - max_length
+    if num_truncated_chars > 0:
+        return f"{text[:max_length]}... <truncated {num_truncated_chars} chars>"
+    return text
+
+
+def _prune_tool_output(value: Any) -> Any:
+    """Shortens long strings and collections nested in a tool output."""
+    if isinstance(value, str):
+        return _truncate(value, _MAX_TOOL_OUTPUT_STRING_LENGTH)
+    if isinstance(value, dict):
+        pruned = {key: _prune_tool_output(item) for key, item in list(value.items())[:_MAX_TOOL_OUTPUT_ITEMS]}
+        if len(value) > _MAX_TOOL_OUTPUT_ITEMS:
+            pruned["..."] = f"<truncated {len(value) - _MAX_TOOL_OUTPUT_ITEMS} items>"
+        return pruned
+    if isinstance(value, (list, tuple)):
+        pruned = [_prune_tool_output(item) for item in value[:_MAX_TOOL_OUTPUT_ITEMS]]
+        if len(value) > _MAX_TOOL_OUTPUT_ITEMS:
+            pruned.append(f"<truncated {len(value) - _MAX_TOOL_OUTPUT_ITEMS} items>")
+        return pruned
+    return value
+
+
+def trim_tool_output(tool_output: Any) -> str:
+    """Converts a tool output to the text shown to the LLM, pruning outputs that are too long."""
+    text = str(tool_output)
+    if len(text) > _MAX_TOOL_OUTPUT_LENGTH and isinstance(tool_output, (dict, list, tuple)):
+        text = str(_prune_tool_output(tool_output))
+    return _truncate(text, _MAX_TOOL_OUTPUT_LENGTH)
+
+
+def _end_of_tool_use(output: str) -> int | None:
+    """Finds where the tool calls of a streamed LLM output end.
+
+    The tool calls end once the JSON of the last tool input is complete, the rest of its closing
+    line is empty, and it is followed by a complete line that does not start another tool call.
+    """
+    start = output.find("{", output.rfind("Tool Input:"))
+    if start == -1:
+        return None
+
+    depth = 0
+    quote = None
+    escaped = False
+    for index in range(start, len(output)):
+        char = output[index]
+        if quote is not None:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                quote = None
+        elif char in ('"', "'"):
+            quote = char
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                end = index + 1
+                break
+    else:
+        return None
+
+    closing_line, *lines = output[end:].split("\n")
+    if not lines or closing_line.strip():
+        return None
+
+    for line in lines[:-1]:
+        line = line.strip()
+        if line:
+            return None if line.startswith("Tool") else end
+    return None
+
+
+def summarize_messages(messages: list[ChatMessage], max_num_tokens: int) -> ChatMessage:
+    """Folds chat messages into a single message that keeps the beginning of each message.
+
+    Lines of an earlier summary are carried over, and the oldest lines are dropped so that
+    the summary does not exceed the maximum number of tokens.
+    """
+    summary_header = CONVERSATION_SUMMARY.format(summary="")
+    lines = []
+    for message in messages:
+        if message.role == ChatMessageRole.SYSTEM and message.content.startswith(summary_header):
+            lines.extend(line for line in message.content.removeprefix(summary_header).split("\n\n") if line)
+        else:
+            content = " ".join(message.content.split())
+            lines.append(f"{message.role}: {_truncate(content, _SUMMARY_MESSAGE_LENGTH)}")
+
+    encoding = _get_encoding()
+    num_tokens = len(encoding.encode_ordinary(summary_header))
+    start = len(lines)
+    while start > 0:
+        num_tokens += len(encoding.encode_ordinary(lines[start - 1])) + 1
+        if num_tokens > max_num_tokens:
+            break
+        start -= 1
+    return ChatMessage(
+        role=ChatMessageRole.SYSTEM, content=CONVERSATION_SUMMARY.format(summary="\n\n".join(lines[start:]))
+    )
+
+
 class AgentOutput(BaseModel):
     """Class that represents the agent output."""
 
@@ -81,6 +206,7 @@ class AgentOutput(BaseModel):
         | list[float]
         | list[dict[str, Any]]
         | list[BaseModel]
+        | None
     )
     steps: list[Step]
 
@@ -97,14 +223,109 @@ class Agent(BaseModel):
     prompting_strategy: PromptingStrategy = PromptingStrategy.CHAIN_OF_THOUGHT
     iterations: int = 5
     verbose: bool = True
+    stream: bool = False
+    _message_num_tokens: dict[int, tuple[ChatMessage, int]] = {}
+    _token_budget: int = 0
+
+    def model_post_init(self, __context: Any) -> None:
+        self._token_budget = _MODEL_TOKEN_LIMIT[self.llm.model] - self.llm.max_tokens
+
+    def _num_tokens(self, message: ChatMessage) -> int:
+        """Counts the number of tokens in a chat message, tokenizing each message only once.
+
+        The counts are keyed by the id of the message and keep a reference to it, so the id
+        cannot be reused by another message while its count is cached.
+        """
+        cached = self._message_num_tokens.get(id(message))
+        if cached is None:
+            cached = (message, _num_tokens_from_message(message))
+            self._message_num_tokens[id(message)] = cached
+        return cached[1]
+
+    def _max_num_tokens(self) -> int:
+        """Estimates an upper bound of the number of tokens in the chat messages without tokenizing them.
+
+        Every token spans at least one UTF-8 byte, and a character takes at most four bytes.
+        """
+        num_tokens = 3
+        for message in self.chat.messages:
+            cached = self._message_num_tokens.get(id(message))
+            if cached is not None:
+                num_tokens += cached[1]
+            else:
+                content = message.content
+                num_tokens += 4 + len(message.role) + (len(content) if content.isascii() else 4 * len(content))
+        return num_tokens
 
     def _trim_conversation(self) -> None:
-        """Trims the chat messages to fit the LLM context length."""
-        num_tokens = num_tokens_from_messages(self.chat.messages)
-        while num_tokens + self.llm.max_tokens >= _MODEL_TOKEN_LIMIT[self.llm.model]:
-            if len(self.chat.messages) > 1:
-                del self.chat.messages[1]
-            num_tokens = num_tokens_from_messages(self.chat.messages)
+        """Trims the chat messages to fit the LLM context length.
+
+        The oldest messages are first folded into a summary, so that the conversation fits
+        with about a third of the token budget to spare. The summary keeps at most a fifth of
+        the token budget, and the current prompt is never summarized. If the conversation still
+        does not fit, the oldest messages after the summary are deleted, then the summary
+        itself, and finally the current prompt.
+        """
+        self._message_num_tokens = {
+            id(message): self._message_num_tokens[id(message)]
+            for message in self.chat.messages
+            if id(message) in self._message_num_tokens
+        }
+        if self._max_num_tokens() < self._token_budget:
+            return
+
+        num_tokens = sum(self._num_tokens(message) for message in self.chat.messages) + 3
+        if num_tokens < self._token_budget:
+            return
+
+        end = 1
+        num_summarized_tokens = 0
+        num_tokens_to_summarize = num_tokens - self._token_budget * (1 - _SUMMARY_TOKEN_FRACTION)
+        while end < len(self.chat.messages) - 1 and num_summarized_tokens < num_tokens_to_summarize:
+            num_summarized_tokens += self._num_tokens(self.chat.messages[end])
+            end += 1
+
+        start = 1
+        if end > 1:
+            summary = summarize_messages(
+                self.chat.messages[1:end], int(self._token_budget * _SUMMARY_MAX_TOKEN_FRACTION)
+            )
+            num_summary_tokens = self._num_tokens(summary)
+            if num_summary_tokens < num_summarized_tokens:
+                self.chat.messages[1:end] = [summary]
+                num_tokens += num_summary_tokens - num_summarized_tokens
+                start = 2
+
+        stop = start
+        while num_tokens >= self._token_budget and stop < len(self.chat.messages) - 1:
+            num_tokens -= self._num_tokens(self.chat.messages[stop])
+            stop += 1
+        del self.chat.messages[start:stop]
+
+        stop = 1
+        while num_tokens >= self._token_budget and stop < len(self.chat.messages):
+            num_tokens -= self._num_tokens(self.chat.messages[stop])
+            stop += 1
+        del self.chat.messages[1:stop]
+
+    def _get_completion(self) -> str:
+        """Gets the LLM output.
+
+        When streaming, the stream is closed as soon as the LLM has finished its tool calls,
+        so the tools can be used without waiting for the rest of the output.
+        """
+        if not self.stream:
+            return self.llm.get_completion(self.chat.messages)
+
+        output = ""
+        with closing(self.llm.stream_completion(self.chat.messages)) as chunks:
+            for chunk in chunks:
+                output += chunk
+                if self.tools is not None and "\n" in chunk and "Tool Input:" in output:
+                    end = _end_of_tool_use(output)
+                    if end is not None:
+                        return output[:end]
+        return output
 
     def _parse_output(self, output: str) -> LLMToolUse | LLMFinalAnswer:
         """Parses the LLM output."""
@@ -139,9 +360,67 @@ class Agent(BaseModel):
 
         return True
 
+    def _use_tools(self, output: LLMToolUse) -> str:
+        """Invokes the tools the LLM asked for and returns the observation.
+
+        Approved tool calls are run concurrently when the LLM asks for more than one tool.
+        """
+        observations = [None] * len(output.tool_calls)
+        approved_tool_calls = []
+        for index, tool_call in enumerate(output.tool_calls):
+            if self.verbose:
+                logger.opt(colors=True).info("<b><fg #EC9A3C>Tool</fg #EC9A3C></b>: {}", tool_call.tool)
+                logger.opt(colors=True).info("<b><fg #EC9A3C>Tool Input</fg #EC9A3C></b>: {}", tool_call.tool_input)
+
+            tool = self.tools.get(tool_call.tool)
+            if tool is None:
+                tool_names = ", ".join(list(self.tools.keys()))
+                observations[index] = f"{tool_call.tool} tool doesn't exist. Try one of these tools: {tool_names}"
+                self.chat.steps.append(Step(name=StepName.OBSERVATION, content=observations[index]))
+                continue
+
+            self.chat.previous_steps.append(f"Tool: {tool_call.tool}")
+            self.chat.previous_steps.append(f"Tool Input: {tool_call.tool_input}")
+            self.chat.steps.append(
+                Step(
+                    name=StepName.TOOL_USE,
+                    content=StepToolUse(thought=output.thought, used=tool_call.tool, arguments=tool_call.tool_input),
+                )
+            )
+            if self._tool_use_approved(tool, tool_call.tool_input):
+                approved_tool_calls.append((index, tool, tool_call.tool_input))
+            else:
+                observations[index] = "\n\n".join(
+                    [
+                        f"The user did not approve the use of the tool: {tool_call.tool}",
+                        CHAIN_OF_THOUGHT_FINAL_ANSWER_INSTRUCTIONS,
+                    ]
+                )
+                self.chat.steps.append(Step(name=StepName.OBSERVATION, content=observations[index]))
+
+        if len(approved_tool_calls) > 1:
+            with ThreadPoolExecutor(max_workers=len(approved_tool_calls)) as executor:
+                tool_outputs = list(
+                    executor.map(lambda tool_call: tool_call[1].invoke(tool_call[2]), approved_tool_calls)
+                )
+        else:
+            tool_outputs = [tool.invoke(tool_input) for _, tool, tool_input in approved_tool_calls]
+
+        for (index, _, _), tool_output in zip(approved_tool_calls, tool_outputs):
+            self.chat.steps.append(Step(name=StepName.TOOL_OUTPUT, content=tool_output))
+            observations[index] = f"Tool Output: {trim_tool_output(tool_output)}"
+            if self.verbose:
+                logger.opt(colors=True).info("<b><fg #EC9A3C>Tool Output</fg #EC9A3C></b>: {}", tool_output)
+
+        return "\n\n".join(observations)
+
+    def format_prompt(self, inputs: dict[str, Any]) -> str:
+        """Fills the prompt variables with the given inputs."""
+        return self.prompt.format_map({variable: inputs.get(variable) for variable in self.prompt_variables})
+
     def invoke(self, prompt: dict[str, Any]) -> AgentOutput:
         """Runs the agent given a prompt."""
-        prompt = self.prompt.format(**{variable: prompt.get(variable) for variable in self.prompt_variables})
+        prompt = self.format_prompt(prompt)
 
         self.chat.steps = [self.chat.steps[0], self.chat.steps[1], Step(name=StepName.PROMPT, content=prompt)]
         self.chat.messages.append(ChatMessage(role=ChatMessageRole.USER, content=prompt))
@@ -150,74 +429,42 @@ class Agent(BaseModel):
         iteration = 0
         while iteration <= self.iterations:
             self._trim_conversation()
-            raw_output = self.llm.get_completion(self.chat.messages)
+            raw_output = self._get_completion()
             output, observation = self._parse_output(raw_output)
             if self.prompting_strategy == PromptingStrategy.CHAIN_OF_THOUGHT:
                 self.chat.steps.append(Step(name=StepName.RAW_OUTPUT, content=raw_output))
                 if output is not None:
                     if self.verbose:
-                        logger.opt(colors=True).info(f"<b><fg #2D72D2>Thought</fg #2D72D2></b>: {output.thought}")
+                        logger.opt(colors=True).info("<b><fg #2D72D2>Thought</fg #2D72D2></b>: {}", output.thought)
 
                     self.chat.previous_steps.append(f"Thought: {output.thought}")
                     if isinstance(output, LLMFinalAnswer):
                         if self.verbose:
                             logger.opt(colors=True).success(
-                                f"<b><fg #32A467>Final Answer</fg #32A467></b>: {output.final_answer}"
+                                "<b><fg #32A467>Final Answer</fg #32A467></b>: {}", output.final_answer
                             )
 
                         self.chat.steps.append(
                             Step(
                                 name=StepName.FINAL_ANSWER,
-                                content=StepFinalAnswer(thought=output.thought, output=output.final_answer),
+                                content=StepFinalAnswer.model_construct(
+                                    thought=output.thought, output=output.final_answer
+                                ),
                             )
                         )
                         self.chat.messages.append(
                             ChatMessage(role=ChatMessageRole.ASSISTANT, content=str(output.final_answer))
                         )
-                        return AgentOutput(prompt=prompt, final_answer=output.final_answer, steps=self.chat.steps)
+                        return AgentOutput.model_construct(
+                            prompt=prompt, final_answer=output.final_answer, steps=list(self.chat.steps)
+                        )
                     else:
                         if self.tools is not None:
-                            if self.verbose:
-                                logger.opt(colors=True).info(f"<b><fg #EC9A3C>Tool</fg #EC9A3C></b>: {output.tool}")
-                                logger.opt(colors=True).info(
-                                    f"<b><fg #EC9A3C>Tool Input</fg #EC9A3C></b>: {output.tool_input}"
-                                )
-
-                            tool = self.tools.get(output.tool)
-                            if tool is not None:
-                                self.chat.previous_steps.append(f"Tool: {output.tool}")
-                                self.chat.previous_steps.append(f"Tool Input: {output.tool_input}")
-                                self.chat.steps.append(
-                                    Step(
-                                        name=StepName.TOOL_USE,
-                                        content=StepToolUse(
-                                            thought=output.thought,
-                                            used=output.tool,
-                                            arguments=output.tool_input,
-                                        ),
-                                    )
-                                )
-                                if self._tool_use_approved(tool, output.tool_input):
-                                    tool_output = tool.invoke(output.tool_input)
-                                    self.chat.steps.append(Step(name=StepName.TOOL_OUTPUT, content=tool_output))
-                                    observation = f"Tool Output: {tool_output}"
-                                    if self.verbose:
-                                        logger.opt(colors=True).info(
-                                            f"<b><fg #EC9A3C>Tool Output</fg #EC9A3C></b>: {tool_output}"
-                                        )
-                                else:
-                                    observation = "\n\n".join(
-                                        [
-                                            f"The user did not approve the use of the tool: {output.tool}",
-                                            CHAIN_OF_THOUGHT_FINAL_ANSWER_INSTRUCTIONS,
-                                        ]
-                                    )
-                            else:
-                                tool_names = ", ".join(list(self.tools.keys()))
-                                observation = f"{output.tool} tool doesn't exist. Try one of these tools: {tool_names}"
+                            observation = self._use_tools(output)
 
                 self.chat.previous_steps.append(f"Observation: {observation}")
-                if self.chat.steps[-1].name != StepName.TOOL_OUTPUT:
+                if output is None or self.tools is None:
+                    # The steps of each tool call are recorded when the tools are used.
                     self.chat.steps.append(Step(name=StepName.OBSERVATION, content=observation))
 
                 self.chat.update(prompt)
@@ -225,38 +472,41 @@ class Agent(BaseModel):
                 if isinstance(output, LLMFinalAnswer):
                     if self.verbose:
                         logger.opt(colors=True).success(
-                            f"<b><fg #32A467>Final Answer</fg #32A467></b>: {output.final_answer}"
+                            "<b><fg #32A467>Final Answer</fg #32A467></b>: {}", output.final_answer
                         )
 
                     self.chat.steps.append(
-                        Step(name=StepName.FINAL_ANSWER, content=StepFinalAnswer(output=output.final_answer))
+                        Step(
+                            name=StepName.FINAL_ANSWER,
+                            content=StepFinalAnswer.model_construct(output=output.final_answer),
+                        )
                     )
                     self.chat.messages.append(
                         ChatMessage(role=ChatMessageRole.ASSISTANT, content=str(output.final_answer))
                     )
-                    return AgentOutput(prompt=prompt, final_answer=output.final_answer, steps=self.chat.steps)
+                    return AgentOutput.model_construct(
+                        prompt=prompt, final_answer=output.final_answer, steps=list(self.chat.steps)
+                    )
 
             iteration += 1
 
         if self.output_parser.output_type == OutputType.STRUCT:
-            final_answer = {key: None for key in self.output_parser.output_schema.model_json_schema()["properties"]}
+            final_answer = dict.fromkeys(self.output_parser.json_schema["properties"])
         elif self.output_parser.output_type == OutputType.ARRAY_STRUCT:
-            final_answer = [{key: None for key in self.output_parser.output_schema.model_json_schema()["properties"]}]
+            final_answer = [dict.fromkeys(self.output_parser.json_schema["properties"])]
         elif self.output_parser.output_type in (OutputType.OBJECT, OutputType.ARRAY_OBJECT):
-            fields = self.output_parser.output_schema.__annotations__
-            optional_fields = {field: (data_type | None, None) for field, data_type in fields.items()}
-            model = create_model(self.output_parser.output_schema.__name__, **optional_fields)
+            model = self.output_parser.optional_output_schema
             final_answer = model() if self.output_parser.output_type == OutputType.OBJECT else [model()]
         else:
             final_answer = None
 
         if self.verbose:
-            logger.opt(colors=True).warning(f"<b><fg #CD4246>Final Answer</fg #CD4246></b>: {final_answer}")
+            logger.opt(colors=True).warning("<b><fg #CD4246>Final Answer</fg #CD4246></b>: {}", final_answer)
 
         if self.prompting_strategy == PromptingStrategy.CHAIN_OF_THOUGHT:
-            return AgentOutput(prompt=prompt, final_answer=final_answer, steps=self.chat.steps)
+            return AgentOutput.model_construct(prompt=prompt, final_answer=final_answer, steps=list(self.chat.steps))
         else:
-            return AgentOutput(prompt=prompt, final_answer=final_answer, steps=self.chat.steps)
+            return AgentOutput.model_construct(prompt=prompt, final_answer=final_answer, steps=list(self.chat.steps))
 
     @classmethod
     def create(
@@ -270,6 +520,7 @@ class Agent(BaseModel):
         tools: list[Tool] | None = None,
         prompting_strategy: PromptingStrategy = PromptingStrategy.CHAIN_OF_THOUGHT,
         verbose: bool = True,
+        stream: bool = False,
     ) -> Agent:
         """Creates an instance of the ReAct agent."""
         if prompting_strategy == PromptingStrategy.CHAIN_OF_THOUGHT:
@@ -280,7 +531,7 @@ class Agent(BaseModel):
                 iterations = 5
             else:
                 instructions = CHAIN_OF_THOUGHT_INSTRUCTIONS_WITH_TOOLS.format(
-                    tools="\n\n".join([str(tool) for tool in tools])
+                    tools="\n\n".join(tool.prompt_description for tool in tools)
                 )
                 tool_use = True
                 tools = {tool.name: tool for tool in tools}
@@ -295,20 +546,18 @@ class Agent(BaseModel):
             if output_schema is None:
                 raise ValueError(f"When using {output_type} as the output type a schema must be provided.")
 
-            schema = output_schema.model_json_schema()
-            if "$defs" not in schema:
-                schema = get_schema_from_args(schema["properties"])
-            final_answer_instructions = FINAL_ANSWER_INSTRUCTIONS[output_type].format(output_schema=schema)
-        elif output_type in (OutputType.DATE, OutputType.TIMESTAMP):
-            final_answer_instructions = FINAL_ANSWER_INSTRUCTIONS[output_type].format(output_schema=output_schema)
-        else:
-            final_answer_instructions = FINAL_ANSWER_INSTRUCTIONS[output_type]
+        output_parser = AgentOutputParser(
+            output_type=output_type,
+            output_schema=output_schema,
+            prompting_strategy=prompting_strategy,
+            tool_use=tool_use,
+        )
 
         chat = Chat(
             messages=[
                 ChatMessage(
                     role=ChatMessageRole.SYSTEM,
-                    content="\n\n".join([system_prompt, instructions, final_answer_instructions]),
+                    content="\n\n".join([system_prompt, instructions, output_parser.final_answer_instructions]),
                 )
             ],
             steps=[
@@ -317,14 +566,7 @@ class Agent(BaseModel):
             ],
         )
 
-        output_parser = AgentOutputParser(
-            output_type=output_type,
-            output_schema=output_schema,
-            prompting_strategy=prompting_strategy,
-            tool_use=tool_use,
-        )
-
-        return Agent(
+        agent = Agent(
             llm=llm,
             tools=tools,
             prompt=prompt,
@@ -334,4 +576,8 @@ class Agent(BaseModel):
             prompting_strategy=prompting_strategy,
             iterations=iterations,
             verbose=verbose,
+            stream=stream,
         )
+        # The system message is never trimmed, so it is tokenized once here and its count reused on every turn.
+        agent._num_tokens(agent.chat.messages[0])
+        return agent
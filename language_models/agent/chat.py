@@ -68,8 +68,9 @@ class Chat(BaseModel):
 
     def update(self, prompt: str) -> None:
         """Modifies the user prompt to include intermediate steps."""
-        self.messages[-1].content = "\n\n".join(
-            [prompt, f"These were your previous steps:\n{'\n\n'.join(self.previous_steps)}"]
+        self.messages[-1] = ChatMessage(
+            role=self.messages[-1].role,
+            content="\n\n".join([prompt, f"These were your previous steps:\n{'\n\n'.join(self.previous_steps)}"]),
         )
 
     def reset(self) -> None:
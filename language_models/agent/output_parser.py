@@ -3,10 +3,11 @@
 import re
 from datetime import date, datetime
 from enum import Enum
+from functools import cached_property
 from typing import Any
 
 import dirtyjson as json
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, ValidationError, create_model
 
 from language_models.agent.prompt import (
     OUTPUT_TYPE_ARRAY_FLOAT,
@@ -34,6 +35,8 @@ Tool Input: <input of the tool to use>
 
 Your <input of the tool to use> should be a JSON format and must be keyword arguments of the properties of <name of the tool to use>
 
+If you need several tools that do not depend on each other's outputs, you can respond with one Tool and Tool Input pair for each of them after your thought
+
 When you know the final answer to the user's query you should respond with:
 ```
 Thought: <thought process on how to respond to the prompt>
@@ -51,7 +54,9 @@ Tool: <name of the tool to use>
 Tool Input: <input of the tool to use>
 ```
 
-Your <input of the tool to use> should be a JSON format and must be keyword arguments of the properties of <name of the tool to use>"""
+Your <input of the tool to use> should be a JSON format and must be keyword arguments of the properties of <name of the tool to use>
+
+If you need several tools that do not depend on each other's outputs, you can respond with one Tool and Tool Input pair for each of them after your thought"""
 
 
 CHAIN_OF_THOUGHT_FINAL_ANSWER_INSTRUCTIONS = """You should respond with:
@@ -98,18 +103,41 @@ FINAL_ANSWER_INSTRUCTIONS = {
     OutputType.ARRAY_STRUCT: OUTPUT_TYPE_ARRAY_OBJECT_OR_STRUCT,
 }
 
+_TOOL_USE_PATTERN = re.compile(r"\s*Thought: (.*?)\n+(Tool: .*)", re.DOTALL)
+_TOOL_CALL_SEPARATOR_PATTERN = re.compile(r"(?<=\})\s*\n+(?=Tool: )")
+_TOOL_CALL_PATTERN = re.compile(r"Tool: ([a-zA-Z0-9_ ]+).*?\n+Tool Input: .*?(\{.*\})", re.DOTALL)
+_FINAL_ANSWER_PATTERN = re.compile(r"\s*Thought: (.*?)\n+Final Answer:([\s\S]*.*?)(?:$)", re.DOTALL)
+_JSON_STR_PATTERN = re.compile(r"\{.*\}", re.MULTILINE | re.IGNORECASE | re.DOTALL)
+_SINGLE_QUOTE_PATTERN = re.compile(r"(?<!\w)\'|\'(?!\w)")
+_KEY_VALUE_PATTERN = re.compile(r'"(\w+)":\s*"([^"]*)"')
+_BINARY_PATTERN = re.compile(r"[01]+")
+
 
 class PromptingStrategy(str, Enum):
     SINGLE_COMPLETION = "single_completion"
     CHAIN_OF_THOUGHT = "chain_of_thought"
 
 
-class LLMToolUse(BaseModel):
-    thought: str
+class LLMToolCall(BaseModel):
     tool: str
     tool_input: dict[str, Any]
 
 
+class LLMToolUse(BaseModel):
+    thought: str
+    tool_calls: list[LLMToolCall]
+
+    @property
+    def tool(self) -> str:
+        """Gets the name of the first tool to use."""
+        return self.tool_calls[0].tool
+
+    @property
+    def tool_input(self) -> dict[str, Any]:
+        """Gets the input of the first tool to use."""
+        return self.tool_calls[0].tool_input
+
+
 class LLMFinalAnswer(BaseModel):
     thought: str | None = None
     final_answer: (
@@ -189,28 +217,69 @@ class AgentOutputParser(BaseModel):
     prompting_strategy: PromptingStrategy
     tool_use: bool
 
-    def _extract_tool_use(self, output: str) -> tuple[str, str, str]:
-        """Extracts the use of a tool."""
-        pattern = r"\s*Thought: (.*?)\n+Tool: ([a-zA-Z0-9_ ]+).*?\n+Tool Input: .*?(\{.*\})"
+    @cached_property
+    def json_schema(self) -> dict[str, Any]:
+        """Gets the JSON schema of the struct or object."""
+        return self.output_schema.model_json_schema()
+
+    @cached_property
+    def schema_instructions(self) -> dict[str, Any] | str:
+        """Gets the schema of the struct or object as shown to the LLM."""
+        schema = self.json_schema
+        if "$defs" not in schema:
+            schema = get_schema_from_args(schema["properties"])
+        return schema
+
+    @cached_property
+    def optional_output_schema(self) -> type[BaseModel]:
+        """Gets a variant of the object schema whose fields are all optional."""
+        fields = self.output_schema.__annotations__
+        optional_fields = {field: (data_type | None, None) for field, data_type in fields.items()}
+        return create_model(self.output_schema.__name__, **optional_fields)
+
+    @cached_property
+    def final_answer_instructions(self) -> str:
+        """Gets the instructions of how to format the final answer."""
+        if self.output_type in (
+            OutputType.OBJECT,
+            OutputType.ARRAY_OBJECT,
+            OutputType.STRUCT,
+            OutputType.ARRAY_STRUCT,
+        ):
+            return FINAL_ANSWER_INSTRUCTIONS[self.output_type].format(output_schema=self.schema_instructions)
+        if self.output_type in (OutputType.DATE, OutputType.TIMESTAMP):
+            return FINAL_ANSWER_INSTRUCTIONS[self.output_type].format(output_schema=self.output_schema)
+        return FINAL_ANSWER_INSTRUCTIONS[self.output_type]
+
+    def _tool_use_error(self, output: str) -> ValueError:
+        """Creates the error raised when the use of a tool cannot be parsed."""
+        return ValueError(
+            "\n\n".join(
+                [
+                    f"Could not parse your response:\n{output}",
+                    f"{CHAIN_OF_THOUGHT_TOOL_INSTRUCTIONS}",
+                ]
+            )
+        )
 
-        match = re.search(pattern, output, re.DOTALL)
+    def _extract_tool_use(self, output: str) -> tuple[str, list[tuple[str, str]]]:
+        """Extracts the use of one or more tools."""
+        match = _TOOL_USE_PATTERN.search(output)
         if not match:
-            raise ValueError(
-                "\n\n".join(
-                    [
-                        f"Could not parse your response:\n{output}",
-                        f"{CHAIN_OF_THOUGHT_TOOL_INSTRUCTIONS}",
-                    ]
-                )
-            )
+            raise self._tool_use_error(output)
 
         thought = match.group(1).strip()
-        tool = match.group(2).strip()
-        tool_input = match.group(3).strip()
-        return thought, tool, tool_input
+        tool_calls = []
+        for tool_call in _TOOL_CALL_SEPARATOR_PATTERN.split(match.group(2)):
+            tool_call_match = _TOOL_CALL_PATTERN.search(tool_call)
+            if not tool_call_match:
+                raise self._tool_use_error(output)
+
+            tool_calls.append((tool_call_match.group(1).strip(), tool_call_match.group(2).strip()))
+        return thought, tool_calls
 
     def _extract_json_str(self, tool_input: str) -> str:
-        match = re.search(r"\{.*\}", tool_input.strip(), re.MULTILINE | re.IGNORECASE | re.DOTALL)
+        match = _JSON_STR_PATTERN.search(tool_input.strip())
         if not match:
             raise ValueError(
                 "\n\n".join(
@@ -224,19 +293,21 @@ class AgentOutputParser(BaseModel):
         return match.group()
 
     def _tool_input_parser(self, json_str: str) -> dict[str, Any]:
-        processed_string = re.sub(r"(?<!\w)\'|\'(?!\w)", '"', json_str)
-        pattern = r'"(\w+)":\s*"([^"]*)"'
-        matches = re.findall(pattern, processed_string)
+        processed_string = _SINGLE_QUOTE_PATTERN.sub('"', json_str)
+        matches = _KEY_VALUE_PATTERN.findall(processed_string)
         return dict(matches)
 
-    def _parse_tool(self, output: str) -> tuple[str, str, dict[str, Any]]:
-        thought, tool, tool_input = self._extract_tool_use(output)
-        json_str = self._extract_json_str(tool_input)
-        try:
-            tool_input_dict = dict(json.loads(json_str))
-        except ValueError:
-            tool_input_dict = self._tool_input_parser(json_str)
-        return thought, tool, tool_input_dict
+    def _parse_tool(self, output: str) -> tuple[str, list[LLMToolCall]]:
+        thought, tool_calls = self._extract_tool_use(output)
+        parsed_tool_calls = []
+        for tool, tool_input in tool_calls:
+            json_str = self._extract_json_str(tool_input)
+            try:
+                tool_input_dict = dict(json.loads(json_str))
+            except ValueError:
+                tool_input_dict = self._tool_input_parser(json_str)
+            parsed_tool_calls.append(LLMToolCall(tool=tool, tool_input=tool_input_dict))
+        return thought, parsed_tool_calls
 
     def _validate_final_answer(
         self, final_answer: str
@@ -284,7 +355,7 @@ class AgentOutputParser(BaseModel):
                 ) from error
 
         if self.output_type == OutputType.BINARY:
-            if bool(re.fullmatch(r"[01]+", final_answer)):
+            if bool(_BINARY_PATTERN.fullmatch(final_answer)):
                 return final_answer
 
             raise ValueError(
@@ -353,15 +424,12 @@ class AgentOutputParser(BaseModel):
                 return final_answer_model if self.output_type == OutputType.OBJECT else final_answer_model.model_dump()
 
             except (ValueError, ValidationError) as error:
-                schema = self.output_schema.model_json_schema()
-                if "$defs" not in schema:
-                    schema = get_schema_from_args(schema["properties"])
                 raise ValueError(
                     "\n\n".join(
                         [
                             f"You made a mistake in your final answer:\n{final_answer}",
                             f"The error was:\n{error}",
-                            f"{OUTPUT_TYPE_OBJECT_OR_STRUCT.format(output_schema=schema)}",
+                            f"{OUTPUT_TYPE_OBJECT_OR_STRUCT.format(output_schema=self.schema_instructions)}",
                         ]
                     )
                 ) from error
@@ -474,15 +542,12 @@ class AgentOutputParser(BaseModel):
                     return [self.output_schema.model_validate(entry).model_dump() for entry in final_answer_list_dict]
 
             except (ValueError, ValidationError) as error:
-                schema = self.output_schema.model_json_schema()
-                if "$defs" not in schema:
-                    schema = get_schema_from_args(schema["properties"])
                 raise ValueError(
                     "\n\n".join(
                         [
                             f"You made a mistake in your final answer:\n{final_answer}",
                             "The error was:\n{error}",
-                            f"{OUTPUT_TYPE_OBJECT_OR_STRUCT.format(output_schema=schema)}",
+                            f"{OUTPUT_TYPE_OBJECT_OR_STRUCT.format(output_schema=self.schema_instructions)}",
                         ]
                     )
                 ) from error
@@ -501,37 +566,18 @@ class AgentOutputParser(BaseModel):
         | list[dict[str, Any]]
         | list[BaseModel],
     ]:
-        pattern = r"\s*Thought: (.*?)\n+Final Answer:([\s\S]*.*?)(?:$)"
-
-        match = re.search(pattern, output, re.DOTALL)
+        match = _FINAL_ANSWER_PATTERN.search(output)
         if not match:
             if self.tool_use:
                 instructions = CHAIN_OF_THOUGHT_INSTRUCTIONS_WITH_TOOLS
             else:
                 instructions = CHAIN_OF_THOUGHT_FINAL_ANSWER_INSTRUCTIONS
-            if self.output_type in (
-                OutputType.OBJECT,
-                OutputType.ARRAY_OBJECT,
-                OutputType.STRUCT,
-                OutputType.ARRAY_STRUCT,
-            ):
-                schema = self.output_schema.model_json_schema()
-                if "$defs" not in schema:
-                    schema = get_schema_from_args(schema["properties"])
-                final_answer_instructions = FINAL_ANSWER_INSTRUCTIONS[self.output_type].format(output_schema=schema)
-            elif self.output_type in (OutputType.DATE, OutputType.TIMESTAMP):
-                final_answer_instructions = FINAL_ANSWER_INSTRUCTIONS[self.output_type].format(
-                    output_schema=self.output_schema
-                )
-            else:
-                final_answer_instructions = FINAL_ANSWER_INSTRUCTIONS[self.output_type]
-
             raise ValueError(
                 "\n\n".join(
                     [
                         f"Could not parse your final answer:\n{output}",
                         f"{instructions}",
-                        f"{final_answer_instructions}",
+                        f"{self.final_answer_instructions}",
                     ]
                 )
             )
@@ -544,44 +590,28 @@ class AgentOutputParser(BaseModel):
     def parse(self, output: str) -> LLMToolUse | LLMFinalAnswer:
         if self.prompting_strategy == PromptingStrategy.CHAIN_OF_THOUGHT:
             if "Tool:" in output:
-                thought, tool, tool_input = self._parse_tool(output)
-                return LLMToolUse(thought=thought, tool=tool, tool_input=tool_input)
+                thought, tool_calls = self._parse_tool(output)
+                return LLMToolUse(thought=thought, tool_calls=tool_calls)
 
             if "Final Answer:" in output:
                 thought, final_answer = self._parse_final_answer(output)
-                return LLMFinalAnswer(thought=thought, final_answer=final_answer)
+                # The final answer is already validated, so the large union of output types is not checked again.
+                return LLMFinalAnswer.model_construct(thought=thought, final_answer=final_answer)
 
             if self.tool_use:
                 instructions = CHAIN_OF_THOUGHT_INSTRUCTIONS_WITH_TOOLS
             else:
                 instructions = CHAIN_OF_THOUGHT_FINAL_ANSWER_INSTRUCTIONS
 
-            if self.output_type in (
-                OutputType.OBJECT,
-                OutputType.ARRAY_OBJECT,
-                OutputType.STRUCT,
-                OutputType.ARRAY_STRUCT,
-            ):
-                schema = self.output_schema.model_json_schema()
-                if "$defs" not in schema:
-                    schema = get_schema_from_args(schema["properties"])
-                final_answer_instructions = FINAL_ANSWER_INSTRUCTIONS[self.output_type].format(output_schema=schema)
-            elif self.output_type in (OutputType.DATE, OutputType.TIMESTAMP):
-                final_answer_instructions = FINAL_ANSWER_INSTRUCTIONS[self.output_type].format(
-                    output_schema=self.output_schema
-                )
-            else:
-                final_answer_instructions = FINAL_ANSWER_INSTRUCTIONS[self.output_type]
-
             raise ValueError(
                 "\n\n".join(
                     [
                         f"Could not parse your response:\n{output}",
                         f"{instructions}",
-                        f"{final_answer_instructions}",
+                        f"{self.final_answer_instructions}",
                     ]
                 )
             )
         else:
             final_answer = self._validate_final_answer(output)
-            return LLMFinalAnswer(final_answer=final_answer)
+            return LLMFinalAnswer.model_construct(final_answer=final_answer)
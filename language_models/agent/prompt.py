@@ -29,6 +29,8 @@ Tool Input: <input of the tool to use>
 
 Your <input of the tool to use> should be a JSON format and must be keyword arguments of the properties of <name of the tool to use>
 
+If you need several tools that do not depend on each other's outputs, you can respond with one Tool and Tool Input pair for each of them after your thought
+
 When you know the final answer to the user's query you should respond with:
 ```
 Thought: <thought process on how to respond to the prompt>
@@ -104,3 +106,9 @@ OUTPUT_TYPE_DATE = """Your <response to the prompt> should be the final answer t
 
 OUTPUT_TYPE_TIMESTAMP = """Your <response to the prompt> should be the final answer to the user's query and must be a timestamp with the format:
 {output_schema}"""
+
+
+CONVERSATION_SUMMARY = """### Summary ###
+
+This is a summary of the earlier conversation with the user:
+{summary}"""
@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import sys
 from enum import Enum
 from functools import reduce
 from typing import Any, Callable, Literal
@@ -13,9 +12,6 @@ from pydantic import BaseModel
 from language_models.agent.agent import Agent, Step, StepName
 from language_models.tools.tool import Tool
 
-logger.remove()
-logger.add(sys.stderr, format="{message}", level="INFO")
-
 
 class WorkflowStepName(str, Enum):
     TRANSFORMATION = "transformation"
@@ -66,15 +62,15 @@ class WorkflowFunctionStep(BaseModel):
 
     def invoke(self, inputs: dict[str, Any], verbose: bool) -> WorkflowStepOutput:
         if verbose:
-            logger.opt(colors=True).info(f"<b><fg #2D72D2>Use Function</fg #2D72D2></b>: {self.name}")
+            logger.opt(colors=True).info("<b><fg #2D72D2>Use Function</fg #2D72D2></b>: {}", self.name)
 
         inputs = {key: value for key, value in inputs.items() if key in self.inputs.model_fields}
         if verbose:
-            logger.opt(colors=True).info(f"<b><fg #EC9A3C>Inputs</fg #EC9A3C></b>: {inputs}")
+            logger.opt(colors=True).info("<b><fg #EC9A3C>Inputs</fg #EC9A3C></b>: {}", inputs)
 
         output = self.function(**inputs)
         if verbose:
-            logger.opt(colors=True).info(f"<b><fg #EC9A3C>Output</fg #EC9A3C></b>: {output}")
+            logger.opt(colors=True).info("<b><fg #EC9A3C>Output</fg #EC9A3C></b>: {}", output)
 
         return WorkflowStepOutput(
             inputs=inputs,
@@ -102,19 +98,16 @@ class WorkflowLLMStep(BaseModel):
 
     def invoke(self, inputs: dict[str, Any], verbose: bool) -> WorkflowStepOutput:
         if verbose:
-            logger.opt(colors=True).info(f"<b><fg #2D72D2>Use LLM</fg #2D72D2></b>: {self.name}")
+            logger.opt(colors=True).info("<b><fg #2D72D2>Use LLM</fg #2D72D2></b>: {}", self.name)
 
         inputs = {variable: inputs.get(variable) for variable in self.agent.prompt_variables}
         if verbose:
-            logger.opt(colors=True).info(f"<b><fg #EC9A3C>Inputs</fg #EC9A3C></b>: {inputs}")
-
-        prompt = self.agent.prompt.format(**inputs)
-        if verbose:
-            logger.opt(colors=True).info(f"<b><fg #738091>Prompt</fg #738091></b>: {prompt}")
+            logger.opt(colors=True).info("<b><fg #EC9A3C>Inputs</fg #EC9A3C></b>: {}", inputs)
+            logger.opt(colors=True).info("<b><fg #738091>Prompt</fg #738091></b>: {}", self.agent.format_prompt(inputs))
 
         output = self.agent.invoke(inputs)
         if verbose:
-            logger.opt(colors=True).info(f"<b><fg #EC9A3C>Output</fg #EC9A3C></b>: {output.final_answer}")
+            logger.opt(colors=True).info("<b><fg #EC9A3C>Output</fg #EC9A3C></b>: {}", output.final_answer)
 
         return WorkflowStepOutput(
             inputs=inputs,
@@ -140,12 +133,12 @@ class WorkflowTransformationStep(BaseModel):
 
     def invoke(self, inputs: dict[str, Any], verbose: bool) -> WorkflowStepOutput:
         if verbose:
-            logger.opt(colors=True).info(f"<b><fg #2D72D2>Use Transformation</fg #2D72D2></b>: {self.name}")
+            logger.opt(colors=True).info("<b><fg #2D72D2>Use Transformation</fg #2D72D2></b>: {}", self.name)
 
         values = inputs[self.input_field]
         inputs = {self.input_field: values}
         if verbose:
-            logger.opt(colors=True).info(f"<b><fg #EC9A3C>Inputs</fg #EC9A3C></b>: {inputs}")
+            logger.opt(colors=True).info("<b><fg #EC9A3C>Inputs</fg #EC9A3C></b>: {}", inputs)
 
         if self.transformation == "map":
             transformed_values = map(self.function, values)
@@ -157,7 +150,7 @@ class WorkflowTransformationStep(BaseModel):
             output = reduce(self.function, values)
 
         if verbose:
-            logger.opt(colors=True).info(f"<b><fg #EC9A3C>Output</fg #EC9A3C></b>: {output}")
+            logger.opt(colors=True).info("<b><fg #EC9A3C>Output</fg #EC9A3C></b>: {}", output)
 
         return WorkflowStepOutput(
             inputs=inputs,
@@ -232,7 +225,7 @@ class Workflow(BaseModel):
 
         output = state_manager.state.get(self.output)
         if self.verbose:
-            logger.opt(colors=True).success(f"<b><fg #32A467>Workflow Output</fg #32A467></b>: {output}")
+            logger.opt(colors=True).success("<b><fg #32A467>Workflow Output</fg #32A467></b>: {}", output)
 
         return WorkflowOutput(inputs=inputs, output=output, steps=workflow_steps)
 
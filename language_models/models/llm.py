@@ -1,6 +1,8 @@
 """OpenAI LLMs."""
 
+from contextlib import closing
 from enum import Enum
+from typing import Iterator
 
 from pydantic import BaseModel
 
@@ -48,3 +50,29 @@ class OpenAILanguageModel(BaseModel):
             },
         )
         return response["choices"][0]["message"]["content"]
+
+    def stream_completion(self, messages: list[ChatMessage]) -> Iterator[str]:
+        """Streams a model response for the given chat conversation.
+
+        Args:
+            messages: A list of messages comprising the conversation so far.
+
+        Yields:
+            The chunks of the chat completion content.
+        """
+        chunks = self.proxy_client.stream(
+            api_endpoint="completions",
+            data={
+                "deployment_id": self.model,
+                "messages": [message.model_dump() for message in messages],
+                "max_tokens": self.max_tokens,
+                "temperature": self.temperature,
+            },
+        )
+        with closing(chunks):
+            for chunk in chunks:
+                if not chunk.get("choices"):
+                    continue
+                content = chunk["choices"][0].get("delta", {}).get("content")
+                if content:
+                    yield content
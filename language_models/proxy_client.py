@@ -1,6 +1,8 @@
 """BTP proxy client."""
 
+import json
 from datetime import datetime, timedelta, timezone
+from typing import Iterator
 
 import requests
 from pydantic import BaseModel
@@ -13,6 +15,17 @@ from tenacity import (
 
 from language_models.settings import settings
 
+_retry = retry(
+    stop=stop_after_attempt(settings.API_MAX_RETRIES),
+    wait=wait_exponential(
+        multiplier=1,
+        min=settings.API_MIN_RETRY_TIMEOUT_SECONDS,
+        max=settings.API_MAX_RETRY_TIMEOUT_SECONDS,
+    ),
+    retry=retry_if_exception_type(requests.exceptions.RequestException)
+    | retry_if_exception_type(requests.exceptions.HTTPError),
+)
+
 
 class ProxyClient(BaseModel):
     """Class that implements the BTP proxy client."""
@@ -50,16 +63,7 @@ class ProxyClient(BaseModel):
             current_time - self._access_token_expiry < timedelta(minutes=settings.API_ACCESS_TOKEN_EXPIRY_MINUTES)
         )
 
-    @retry(
-        stop=stop_after_attempt(settings.API_MAX_RETRIES),
-        wait=wait_exponential(
-            multiplier=1,
-            min=settings.API_MIN_RETRY_TIMEOUT_SECONDS,
-            max=settings.API_MAX_RETRY_TIMEOUT_SECONDS,
-        ),
-        retry=retry_if_exception_type(requests.exceptions.RequestException)
-        | retry_if_exception_type(requests.exceptions.HTTPError),
-    )
+    @_retry
     def request(self, api_endpoint: str, data: dict) -> requests.Response.json:
         """Handles the request to the LLM service.
 
@@ -94,3 +98,52 @@ class ProxyClient(BaseModel):
         except requests.exceptions.RequestException as error:
             raise error
         return response.json()
+
+    @_retry
+    def _open_stream(self, api_endpoint: str, data: dict) -> requests.Response:
+        """Opens a streamed request to the LLM service."""
+        if self._access_token_expired_or_missing():
+            self._fetch_access_token()
+        response = requests.post(
+            f"{self.api_base}/api/v1/{api_endpoint}",
+            headers=self._headers,
+            json=data,
+            timeout=settings.API_REQUEST_TIMEOUT_SECONDS,
+            stream=True,
+        )
+        if response.status_code in (401, 403):
+            response.close()
+            self._fetch_access_token()
+            response = requests.post(
+                f"{self.api_base}/api/v1/{api_endpoint}",
+                headers=self._headers,
+                json=data,
+                timeout=settings.API_REQUEST_TIMEOUT_SECONDS,
+                stream=True,
+            )
+        response.raise_for_status()
+        return response
+
+    def stream(self, api_endpoint: str, data: dict) -> Iterator[dict]:
+        """Handles a streamed request to the LLM service.
+
+        The connection is closed as soon as the iterator is closed, which cancels the generation of the response.
+
+        Args:
+            api_endpoint: Completions.
+            data: JSON object to send to the specified URL.
+
+        Yields:
+            JSON content of each server-sent event.
+
+        Raises:
+            RequestException: An error that occurred while handling the API request.
+        """
+        with self._open_stream(api_endpoint, {**data, "stream": True}) as response:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                event = line.removeprefix("data:").strip()
+                if event == "[DONE]":
+                    break
+                yield json.loads(event)
@@ -1,5 +1,6 @@
 """LLM tool."""
 
+from functools import cached_property
 from typing import Any, Callable
 
 from pydantic import BaseModel, ValidationError
@@ -23,7 +24,7 @@ class Tool(BaseModel):
     args_schema: type[BaseModel] | None = None
     requires_approval: bool = False
 
-    @property
+    @cached_property
     def args(self) -> dict[str, Any]:
         """Gets the tool model JSON schema."""
         if self.args_schema is None:
@@ -57,5 +58,10 @@ class Tool(BaseModel):
             )
         return output
 
-    def __str__(self) -> str:
+    @cached_property
+    def prompt_description(self) -> str:
+        """Gets the description of the tool as shown to the LLM."""
         return f"- Tool Name: {self.name}, Tool Description: {self.description}, Tool Input: {self.args}"
+
+    def __str__(self) -> str:
+        return self.prompt_description